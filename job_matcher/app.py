@@ -6,11 +6,10 @@ Helps users find early-career job opportunities by matching their resume to job
 import os
 import time
 import streamlit as st
-import pandas as pd
 from pathlib import Path
 
-# Import our utility classes
-from utils import ResumeParser, JobScraper, JobMatcher
+# Utility classes and pandas are imported where they are first needed, so the
+# page renders before torch, spaCy and pandas finish loading
 
 # Set page configuration
 st.set_page_config(
@@ -29,6 +28,27 @@ for dir_path in [DATA_DIR, UPLOAD_DIR, CACHE_DIR]:
     dir_path.mkdir(parents=True, exist_ok=True)
 
 
+@st.cache_resource
+def get_parser(cache_dir):
+    """Create the resume parser once and reuse it across reruns."""
+    from utils import ResumeParser
+    return ResumeParser(cache_dir=cache_dir)
+
+
+@st.cache_resource
+def get_scraper(cache_dir):
+    """Create the job scraper once and reuse it across reruns."""
+    from utils import JobScraper
+    return JobScraper(cache_dir=cache_dir)
+
+
+@st.cache_resource
+def get_matcher(cache_dir, model_name='all-MiniLM-L6-v2'):
+    """Load the job matcher (and its model) once and reuse it across reruns."""
+    from utils import JobMatcher
+    return JobMatcher(model_name, cache_dir=cache_dir)
+
+
 def apply_custom_style():
     """Apply custom CSS styling."""
     st.markdown("""
@@ -176,6 +196,85 @@ def display_job_matches(job_matches, num_matches=10):
         """, unsafe_allow_html=True)
 
 
+@st.fragment
+def job_matches_fragment():
+    """
+    Run the pending job search and show the results.
+    
+    Runs as a fragment, so interacting with widgets in here (e.g. the CSV
+    download) only reruns this function instead of the whole page.
+    """
+    st.header("Job Matches")
+    
+    # Check if we need to perform a search
+    if hasattr(st.session_state, 'perform_search') and st.session_state.perform_search:
+        params = st.session_state.search_params
+        
+        with st.spinner(f"Searching for {params['job_query']} jobs in {params['location']}..."):
+            # Scrape jobs
+            scraper = get_scraper(str(CACHE_DIR))
+            jobs = scraper.scrape_jobs(
+                params['job_query'], 
+                params['location'], 
+                num_pages=params['num_jobs']//10)
+            
+            if jobs and params.get('fetch_descriptions'):
+                st.info(f"Found {len(jobs)} job listings. Fetching full descriptions...")
+                jobs = scraper.get_full_descriptions(jobs)
+            
+            if jobs:
+                st.info(f"Found {len(jobs)} job listings. Calculating matches...")
+                
+                # Match jobs to resume
+                matcher = get_matcher(str(CACHE_DIR))
+                job_matches = matcher.rank_jobs_for_resume(
+                    st.session_state.resume_data, 
+                    jobs)
+                
+                st.session_state.job_matches = job_matches
+                st.session_state.num_matches_to_show = params['num_matches']
+            else:
+                st.error("No jobs found. Try different search parameters.")
+            
+            # Reset search flag
+            st.session_state.perform_search = False
+            st.session_state.search_complete = True
+    
+    # Display job matches if available
+    if st.session_state.job_matches:
+        download_data = []
+        for match in st.session_state.job_matches:
+            job = match['job']
+            download_data.append({
+                "Title": job['title'],
+                "Company": job['company'],
+                "Location": job['location'],
+                "Match Score": f"{match['match_score']:.2f}",
+                "URL": job['url']
+            })
+        
+        # Create download button for job matches
+        import pandas as pd
+        df = pd.DataFrame(download_data)
+        csv = df.to_csv(index=False)
+        st.download_button(
+            label="Download Job Matches as CSV",
+            data=csv,
+            file_name="job_matches.csv",
+            mime="text/csv",
+        )
+        
+        # Show matches
+        display_job_matches(
+            st.session_state.job_matches, 
+            st.session_state.num_matches_to_show
+        )
+    elif st.session_state.search_complete:
+        st.warning("No matching jobs found. Try adjusting your search parameters.")
+    else:
+        st.info("Enter search parameters and click 'Find Matching Jobs' to see results.")
+
+
 def main():
     """Main application function."""
     apply_custom_style()
@@ -199,19 +298,21 @@ def main():
         st.header("Resume Upload")
         uploaded_file = st.file_uploader("Upload your resume", type=['pdf', 'txt'])
         
-        if uploaded_file is not None:
+        # Only parse a newly uploaded file, not on every rerun with the same file
+        if uploaded_file is not None and st.session_state.get('parsed_file') != uploaded_file.file_id:
             with st.spinner("Parsing your resume..."):
                 # Save file locally
                 file_path = save_uploaded_file(uploaded_file)
                 
                 # Parse resume
-                parser = ResumeParser()
+                parser = get_parser(str(CACHE_DIR))
                 resume_data = parser.parse_resume(file_path)
                 
                 if "error" in resume_data:
                     st.error(f"Error parsing resume: {resume_data['error']}")
                 else:
                     st.session_state.resume_data = resume_data
+                    st.session_state.parsed_file = uploaded_file.file_id
                     st.success("Resume successfully parsed!")
         
         # Job search parameters
@@ -244,6 +345,10 @@ def main():
         
         num_jobs = st.slider("Number of jobs to scrape", 10, 100, 30)
         num_matches = st.slider("Number of top matches to display", 5, 20, 10)
+        fetch_descriptions = st.checkbox(
+            "Fetch full job descriptions",
+            value=False,
+            help="Match against each job's full description instead of its snippet (slower)")
         
         # Start search button
         search_button = st.button("Find Matching Jobs")
@@ -264,7 +369,8 @@ def main():
                     "job_query": job_query,
                     "location": location,
                     "num_jobs": num_jobs,
-                    "num_matches": num_matches
+                    "num_matches": num_matches,
+                    "fetch_descriptions": fetch_descriptions
                 }
     
     # Main content area
@@ -300,70 +406,7 @@ def main():
             display_resume_data(st.session_state.resume_data)
             
         with tab2:
-            st.header("Job Matches")
-            
-            # Check if we need to perform a search
-            if hasattr(st.session_state, 'perform_search') and st.session_state.perform_search:
-                params = st.session_state.search_params
-                
-                with st.spinner(f"Searching for {params['job_query']} jobs in {params['location']}..."):
-                    # Scrape jobs
-                    scraper = JobScraper(cache_dir=str(CACHE_DIR))
-                    jobs = scraper.scrape_jobs(
-                        params['job_query'], 
-                        params['location'], 
-                        num_pages=params['num_jobs']//10)
-                    
-                    if jobs:
-                        st.info(f"Found {len(jobs)} job listings. Calculating matches...")
-                        
-                        # Match jobs to resume
-                        matcher = JobMatcher()
-                        job_matches = matcher.rank_jobs_for_resume(
-                            st.session_state.resume_data, 
-                            jobs)
-                        
-                        st.session_state.job_matches = job_matches
-                        st.session_state.num_matches_to_show = params['num_matches']
-                    else:
-                        st.error("No jobs found. Try different search parameters.")
-                    
-                    # Reset search flag
-                    st.session_state.perform_search = False
-                    st.session_state.search_complete = True
-            
-            # Display job matches if available
-            if st.session_state.job_matches:
-                download_data = []
-                for match in st.session_state.job_matches:
-                    job = match['job']
-                    download_data.append({
-                        "Title": job['title'],
-                        "Company": job['company'],
-                        "Location": job['location'],
-                        "Match Score": f"{match['match_score']:.2f}",
-                        "URL": job['url']
-                    })
-                
-                # Create download button for job matches
-                df = pd.DataFrame(download_data)
-                csv = df.to_csv(index=False)
-                st.download_button(
-                    label="Download Job Matches as CSV",
-                    data=csv,
-                    file_name="job_matches.csv",
-                    mime="text/csv",
-                )
-                
-                # Show matches
-                display_job_matches(
-                    st.session_state.job_matches, 
-                    st.session_state.num_matches_to_show
-                )
-            elif st.session_state.search_complete:
-                st.warning("No matching jobs found. Try adjusting your search parameters.")
-            else:
-                st.info("Enter search parameters and click 'Find Matching Jobs' to see results.")
+            job_matches_fragment()
 
 
 if __name__ == "__main__":
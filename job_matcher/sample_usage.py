@@ -13,7 +13,7 @@ import argparse
 
 def parse_resume(resume_path):
     """Parse a resume file and print extracted information."""
-    parser = ResumeParser()
+    parser = ResumeParser(cache_dir="./data/cache")
     print(f"Parsing resume: {resume_path}")
     
     resume_data = parser.parse_resume(resume_path)
@@ -41,16 +41,26 @@ def parse_resume(resume_path):
     return resume_data
 
 
-def search_jobs(query, location, num_pages=2):
+def search_jobs(query, location, num_pages=2, full_descriptions=False):
     """Search for jobs and return results."""
     scraper = JobScraper(cache_dir="./data/cache")
     print(f"\nSearching for '{query}' jobs in '{location}'...")
     
-    start_time = time.time()
-    jobs = scraper.scrape_jobs(query, location, num_pages=num_pages)
-    elapsed_time = time.time() - start_time
-    
-    print(f"Found {len(jobs)} jobs in {elapsed_time:.1f} seconds")
+    try:
+        start_time = time.time()
+        jobs = scraper.scrape_jobs(query, location, num_pages=num_pages)
+        elapsed_time = time.time() - start_time
+        
+        print(f"Found {len(jobs)} jobs in {elapsed_time:.1f} seconds")
+        
+        if jobs and full_descriptions:
+            start_time = time.time()
+            jobs = scraper.get_full_descriptions(jobs)
+            elapsed_time = time.time() - start_time
+            print(f"Fetched full descriptions in {elapsed_time:.1f} seconds")
+    finally:
+        # Close the HTTP connections and the scraper's event loop
+        scraper.close()
     
     if jobs:
         print("\n===== SAMPLE JOB =====")
@@ -66,7 +76,7 @@ def search_jobs(query, location, num_pages=2):
 
 def match_jobs(resume_data, jobs, top_n=5):
     """Match jobs to resume and print top results."""
-    matcher = JobMatcher()
+    matcher = JobMatcher(cache_dir="./data/cache")
     print("\nMatching jobs to resume...")
     
     start_time = time.time()
@@ -123,6 +133,8 @@ def main():
                       help="Number of pages to scrape (default: 2)")
     parser.add_argument("--matches", "-m", type=int, default=5,
                       help="Number of top matches to show (default: 5)")
+    parser.add_argument("--full-descriptions", "-f", action="store_true",
+                      help="Fetch each job's full description before matching (slower)")
     
     args = parser.parse_args()
     
@@ -137,7 +149,7 @@ def main():
         return
     
     # Search for jobs
-    jobs = search_jobs(args.query, args.location, args.pages)
+    jobs = search_jobs(args.query, args.location, args.pages, args.full_descriptions)
     if not jobs:
         print("No jobs found. Try a different search query or location.")
         return
@@ -1,10 +1,26 @@
 """
 Job Matcher Utils Module
 Collection of utility classes for the job matching application
+
+Classes are imported on first access, so using one of them doesn't pay the
+import cost (torch, spaCy, ...) of the others.
 """
 
-from .resume_parser import ResumeParser
-from .job_scraper import JobScraper
-from .job_matcher import JobMatcher
+import importlib
+
+# Class name -> submodule defining it
+_CLASS_MODULES = {
+    'ResumeParser': '.resume_parser',
+    'JobScraper': '.job_scraper',
+    'JobMatcher': '.job_matcher',
+}
 
 __all__ = ['ResumeParser', 'JobScraper', 'JobMatcher']
+
+
+def __getattr__(name):
+    """Import a utility class the first time it is accessed."""
+    if name in _CLASS_MODULES:
+        module = importlib.import_module(_CLASS_MODULES[name], __name__)
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -3,25 +3,158 @@ Job Matcher Module
 Uses sentence transformers to compare resumes with job listings and rank matches
 """
 
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from functools import lru_cache
+from pathlib import Path
+
+import ahocorasick
 import numpy as np
+import torch
 from sentence_transformers import SentenceTransformer
 
+# Fields of the preprocessed resume and job that get embedded for matching
+RESUME_FIELDS = ('skills_text', 'experience_text', 'education_text', 'full_profile', 'location')
+JOB_FIELDS = ('description', 'title', 'location')
+
+# Resume field and job field compared for each weighted component
+COMPONENT_PAIRS = {
+    'skills': ('skills_text', 'description'),
+    'experience': ('experience_text', 'description'),
+    'education': ('education_text', 'description'),
+    'location': ('location', 'location'),
+    'title': ('full_profile', 'title'),
+}
+
+# Embeddings are stored in half precision: cosine scores only need 2-3 digits
+# and this halves the memory read by scoring and held by the caches
+EMBEDDING_DTYPE = np.float16
+
+# Similarity thresholds and the quality label for each bucket: a score above
+# 0.8 is "excellent", above 0.6 "strong", ..., 0.2 or below "limited"
+QUALITY_BINS = np.array([0.2, 0.4, 0.6, 0.8])
+QUALITY_LABELS = np.array(['limited', 'moderate', 'good', 'strong', 'excellent'])
+
+# Resume embeddings shared by all JobMatcher instances in the process, keyed by
+# (model name, backend, resume hash), so Streamlit reruns don't re-encode the same resume
+_resume_embedding_cache = OrderedDict()
+_resume_embedding_cache_lock = threading.Lock()
+RESUME_CACHE_SIZE = 32
+
+# Trailing US ZIP code of a location part ("Boston 02110")
+ZIP_CODE_RE = re.compile(r'\s*\d{5}(?:-\d{4})?$')
+
+# Maximum number of keys per SQL "IN (...)" lookup
+SQLITE_MAX_PARAMS = 500
+
+
+@lru_cache(maxsize=None)
+def load_model(model_name, quantize=False, device='cpu', num_threads=None):
+    """
+    Load a sentence embedding model once per process.
+    
+    With quantize=True on CPU the model runs as an int8 ONNX Runtime model
+    using num_threads threads per call (ONNX Runtime's default if None).
+    Falls back to the regular sentence transformer if the ONNX dependencies
+    are missing or the export fails. On CUDA the model runs in half precision.
+    """
+    if quantize and device == 'cpu':
+        try:
+            from .quantized_encoder import ExportError, QuantizedEncoder
+        except ImportError as e:
+            print(f"ONNX Runtime dependencies missing ({e}), using the sentence transformer instead")
+        else:
+            try:
+                print(f"Loading quantized ONNX model: {model_name}")
+                return QuantizedEncoder(model_name, num_threads=num_threads)
+            except ExportError as e:
+                print(f"Quantized model unavailable ({e}), using the sentence transformer instead")
+    
+    print(f"Loading sentence transformer model: {model_name} ({device})")
+    model = SentenceTransformer(model_name, device=device)
+    if device == 'cuda':
+        model.half()
+    return model
+
+
+@lru_cache(maxsize=RESUME_CACHE_SIZE)
+def skill_automaton(skills):
+    """
+    Build an Aho-Corasick automaton over the lowercased resume skills.
+    
+    Args:
+        skills: Tuple of skill strings
+        
+    Returns:
+        ahocorasick.Automaton mapping each lowercased skill to itself,
+        or None if there are no skills
+    """
+    automaton = ahocorasick.Automaton()
+    for skill in skills:
+        if skill:
+            automaton.add_word(skill.lower(), skill.lower())
+    
+    if len(automaton) == 0:
+        return None
+    
+    automaton.make_automaton()
+    return automaton
+
 
 class JobMatcher:
-    def __init__(self, model_name='all-MiniLM-L6-v2'):
+    def __init__(self, model_name='all-MiniLM-L6-v2', quantize=True, num_workers=1, cache_dir=None):
         """
         Initialize the job matcher with a sentence transformer model.
         Args:
             model_name: Name of the sentence transformer model to use
+            quantize: Run the model as an int8 ONNX model when on CPU and available
+            num_workers: Number of threads encoding batches concurrently
+            cache_dir: Directory to store job text embeddings between runs
         """
-        # Initialize the model (will download if not cached)
-        print(f"Loading sentence transformer model: {model_name}")
+        # Initialize the model (will download if not cached, reused if already loaded)
+        self.model_name = model_name
+        self.device = 'cuda' if torch.cuda.is_available() else 'cpu'
+        
+        # Texts per model call (GPUs need larger batches to be kept busy), and how
+        # many calls may run at once. With several workers each one gets a share
+        # of the CPU threads to avoid oversubscribing.
+        self.batch_size = 128 if self.device == 'cuda' else 32
+        self.num_workers = max(1, num_workers)
+        worker_threads = None
+        if self.num_workers > 1:
+            worker_threads = max(1, (os.cpu_count() or 1) // self.num_workers)
+        
         try:
-            self.model = SentenceTransformer(model_name)
+            self.model = load_model(model_name, quantize, self.device, worker_threads)
         except Exception as e:
             print(f"Error loading model: {e}")
             raise
         
+        # The ONNX session got its thread count above; torch's is process-wide
+        if worker_threads and isinstance(self.model, SentenceTransformer):
+            torch.set_num_threads(worker_threads)
+        
+        # Create the embedding cache database if a cache directory is specified.
+        # Like the job cache, entries older than a day are ignored and pruned.
+        self.embedding_db = None
+        self.cache_max_age = 24 * 3600
+        if cache_dir:
+            Path(cache_dir).mkdir(parents=True, exist_ok=True)
+            self.embedding_db = Path(cache_dir) / "embeddings.sqlite"
+            with closing(sqlite3.connect(self.embedding_db)) as conn, conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, ts REAL, vector BLOB)"
+                )
+                conn.execute("CREATE INDEX IF NOT EXISTS embeddings_ts ON embeddings (ts)")
+        
         # Match reason templates
         self.reason_templates = {
             "skills": "Skills match: {}",
@@ -104,6 +237,7 @@ class JobMatcher:
         # Get job description - prefer full description if available
         description = job.get('full_description', '') or job.get('snippet', '')
         processed_job['description'] = description
+        processed_job['description_lower'] = description.lower()
         
         # Get company name
         processed_job['company'] = job.get('company', '')
@@ -133,117 +267,246 @@ class JobMatcher:
         if not text1 or not text2:
             return 0.0
             
-        # Encode both texts
-        embedding1 = self.model.encode(text1, convert_to_numpy=True)
-        embedding2 = self.model.encode(text2, convert_to_numpy=True)
+        # Encode both texts in one call, L2-normalized by the model
+        embedding1, embedding2 = self.model.encode(
+            [text1, text2],
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False
+        )
         
-        # Calculate cosine similarity
-        similarity = np.dot(embedding1, embedding2) / (np.linalg.norm(embedding1) * np.linalg.norm(embedding2))
+        # Cosine similarity of unit vectors is their dot product
+        similarity = np.dot(embedding1, embedding2)
         
         return float(similarity)
 
-    def match_job_to_resume(self, resume_data, job):
+    def _run_encoder(self, texts):
         """
-        Calculate how well a job matches a resume.
+        Run the model over a list of non-empty texts.
+        
+        Texts are sorted by length first so each batch is padded to a similar
+        length, then the embeddings are put back in input order.
+        
+        With num_workers > 1 the texts are split into batches that are encoded
+        concurrently; the model releases the GIL while running, so Python-side
+        work for one batch overlaps with inference for another.
         
         Args:
-            resume_data: Dictionary containing parsed resume data
-            job: Dictionary containing job data
+            texts: List of strings to encode
             
         Returns:
-            Dictionary with match score and reasons
+            Array of shape (len(texts), D) with L2-normalized embeddings
         """
-        # Preprocess inputs
-        processed_resume = self._preprocess_resume(resume_data)
-        processed_job = self._preprocess_job(job)
+        def encode(batch):
+            return self.model.encode(
+                batch,
+                batch_size=self.batch_size,
+                convert_to_numpy=True,
+                normalize_embeddings=True,
+                show_progress_bar=False
+            )
         
-        scores = {}
-        reasons = {}
+        order = np.argsort([len(text) for text in texts], kind='stable')
+        sorted_texts = [texts[i] for i in order]
         
-        # Match skills
-        skills_similarity = self.calculate_similarity(
-            processed_resume['skills_text'],
-            processed_job['description']
-        )
-        scores['skills'] = skills_similarity
-        
-        reason_quality = "excellent" if skills_similarity > 0.8 else \
-                        "strong" if skills_similarity > 0.6 else \
-                        "good" if skills_similarity > 0.4 else \
-                        "moderate" if skills_similarity > 0.2 else "limited"
-                        
-        reasons['skills'] = self.reason_templates['skills'].format(reason_quality)
-        
-        # Match experience
-        exp_similarity = self.calculate_similarity(
-            processed_resume['experience_text'],
-            processed_job['description']
-        )
-        scores['experience'] = exp_similarity
-        
-        reason_quality = "excellent" if exp_similarity > 0.8 else \
-                        "strong" if exp_similarity > 0.6 else \
-                        "good" if exp_similarity > 0.4 else \
-                        "moderate" if exp_similarity > 0.2 else "limited"
-                        
-        reasons['experience'] = self.reason_templates['experience'].format(reason_quality)
-        
-        # Match education
-        edu_similarity = self.calculate_similarity(
-            processed_resume['education_text'],
-            processed_job['description']
-        )
-        scores['education'] = edu_similarity
-        
-        reason_quality = "excellent" if edu_similarity > 0.8 else \
-                        "strong" if edu_similarity > 0.6 else \
-                        "good" if edu_similarity > 0.4 else \
-                        "moderate" if edu_similarity > 0.2 else "limited"
-                        
-        reasons['education'] = self.reason_templates['education'].format(reason_quality)
-        
-        # Match location
-        if processed_resume['location'] and processed_job['location']:
-            loc_similarity = self.calculate_similarity(
-                processed_resume['location'],
-                processed_job['location']
-            )
+        if self.num_workers == 1 or len(texts) <= self.batch_size:
+            sorted_embeddings = encode(sorted_texts)
         else:
-            loc_similarity = 0.5  # Neutral if location preference not specified
+            batches = [
+                sorted_texts[i:i + self.batch_size]
+                for i in range(0, len(sorted_texts), self.batch_size)
+            ]
+            with ThreadPoolExecutor(max_workers=self.num_workers) as executor:
+                sorted_embeddings = np.vstack(list(executor.map(encode, batches)))
+        
+        embeddings = np.empty_like(sorted_embeddings)
+        embeddings[order] = sorted_embeddings
+        return embeddings
+
+    def _text_key(self, text):
+        """Content hash identifying a text's embedding for this model and backend."""
+        data = f"{self.model_name}\0{type(self.model).__name__}\0{text}".encode('utf-8')
+        return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+    def _load_cached_embeddings(self, keys):
+        """Return a dictionary of key -> embedding for the keys found in the cache."""
+        dim = self.model.get_sentence_embedding_dimension()
+        min_ts = time.time() - self.cache_max_age
+        found = {}
+        with closing(sqlite3.connect(self.embedding_db)) as conn:
+            for start in range(0, len(keys), SQLITE_MAX_PARAMS):
+                chunk = keys[start:start + SQLITE_MAX_PARAMS]
+                rows = conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(chunk))}) AND ts > ?",
+                    (*chunk, min_ts)
+                )
+                for key, blob in rows:
+                    vector = np.frombuffer(blob, dtype=EMBEDDING_DTYPE)
+                    if vector.shape[0] == dim:
+                        found[key] = vector
+        return found
+
+    def _store_cached_embeddings(self, items):
+        """Persist (key, embedding) pairs to the cache and drop expired entries."""
+        now = time.time()
+        with closing(sqlite3.connect(self.embedding_db)) as conn, conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, ts, vector) VALUES (?, ?, ?)",
+                ((key, now, vector.astype(EMBEDDING_DTYPE).tobytes()) for key, vector in items)
+            )
+            conn.execute("DELETE FROM embeddings WHERE ts <= ?", (now - self.cache_max_age,))
+
+    def _embed_unique(self, texts, use_cache):
+        """
+        Embed a list of unique non-empty texts.
+        
+        With use_cache, embeddings found in the on-disk cache are reused and
+        only the missing texts are encoded (then stored for next time).
+        """
+        if not use_cache or self.embedding_db is None:
+            return self._run_encoder(texts)
         
-        scores['location'] = loc_similarity
+        keys = [self._text_key(text) for text in texts]
+        try:
+            cached = self._load_cached_embeddings(keys)
+        except sqlite3.Error as e:
+            print(f"Error reading embedding cache: {e}")
+            return self._run_encoder(texts)
+        
+        missing = [i for i, key in enumerate(keys) if key not in cached]
+        if missing:
+            new_embeddings = self._run_encoder([texts[i] for i in missing])
+            new_items = [(keys[i], embedding) for i, embedding in zip(missing, new_embeddings)]
+            cached.update(new_items)
+            try:
+                self._store_cached_embeddings(new_items)
+            except sqlite3.Error as e:
+                print(f"Error writing embedding cache: {e}")
+        
+        return np.stack([cached[key] for key in keys])
+
+    def _encode_texts(self, texts, use_cache=False):
+        """
+        Encode a list of texts with a single batched model call.
         
-        reason_quality = "excellent" if loc_similarity > 0.8 else \
-                        "strong" if loc_similarity > 0.6 else \
-                        "good" if loc_similarity > 0.4 else \
-                        "moderate" if loc_similarity > 0.2 else "limited"
-                        
-        reasons['location'] = self.reason_templates['location'].format(reason_quality)
+        Each unique non-empty text is encoded once. Empty texts map to a zero
+        vector, so their similarity with anything is 0.
         
-        # Match job title
-        title_similarity = self.calculate_similarity(
-            processed_resume['full_profile'],
-            processed_job['title']
+        Args:
+            texts: List of strings to encode
+            use_cache: Reuse and update the on-disk embedding cache
+            
+        Returns:
+            Array of shape (len(texts), D) with L2-normalized EMBEDDING_DTYPE embeddings
+        """
+        unique_texts = list(dict.fromkeys(text for text in texts if text))
+        dim = self.model.get_sentence_embedding_dimension()
+        
+        # Last row of the lookup table is the zero vector used for empty texts
+        table = np.zeros((len(unique_texts) + 1, dim), dtype=EMBEDDING_DTYPE)
+        if unique_texts:
+            table[:-1] = self._embed_unique(unique_texts, use_cache)
+        
+        positions = {text: i for i, text in enumerate(unique_texts)}
+        index = np.fromiter(
+            (positions.get(text, len(unique_texts)) for text in texts),
+            dtype=np.intp,
+            count=len(texts)
         )
-        scores['title'] = title_similarity
+        return table[index]
+
+    def _location_rule_score(self, resume_location, job_location):
+        """
+        Score a location pair with cheap string rules where possible.
+        
+        Locations are short labels ("Remote", "New York, NY"), so most pairs
+        can be settled without running the model.
+        
+        Args:
+            resume_location: Location preference from the resume
+            job_location: Location of the job
+            
+        Returns:
+            0.5 if either location is missing, 1.0 if both name the same city
+            ("Boston" and "Boston, MA 02110") or are both remote, otherwise None
+            (use embedding similarity)
+        """
+        if not resume_location or not job_location:
+            return 0.5  # Neutral if location preference not specified
+        
+        resume_lower = resume_location.lower()
+        job_lower = job_location.lower()
+        if 'remote' in resume_lower and 'remote' in job_lower:
+            return 1.0
+        
+        # Only the city (the first comma-separated part, without a ZIP code) has
+        # to match, so a shared state like "Dallas, TX" / "Houston, TX" or a
+        # short label like "CA" in "Chicago, IL" is left to the embedding
+        resume_city = ZIP_CODE_RE.sub('', resume_lower.split(',')[0]).strip()
+        job_city = ZIP_CODE_RE.sub('', job_lower.split(',')[0]).strip()
+        if resume_city and resume_city == job_city:
+            return 1.0
+        
+        return None
+
+    def _encode_resume(self, processed_resume):
+        """
+        Encode the resume fields used for matching, reusing cached embeddings.
+        
+        Args:
+            processed_resume: Output of _preprocess_resume
+            
+        Returns:
+            Read-only array of shape (len(RESUME_FIELDS), D)
+        """
+        texts = [processed_resume[field] for field in RESUME_FIELDS]
+        resume_hash = hashlib.blake2b(json.dumps(texts).encode('utf-8'), digest_size=16).hexdigest()
+        key = (self.model_name, type(self.model).__name__, resume_hash)
         
-        reason_quality = "excellent" if title_similarity > 0.8 else \
-                        "strong" if title_similarity > 0.6 else \
-                        "good" if title_similarity > 0.4 else \
-                        "moderate" if title_similarity > 0.2 else "limited"
-                        
-        reasons['title'] = self.reason_templates['title'].format(reason_quality)
+        with _resume_embedding_cache_lock:
+            embeddings = _resume_embedding_cache.get(key)
+            if embeddings is not None:
+                _resume_embedding_cache.move_to_end(key)
+                return embeddings
+        
+        embeddings = self._encode_texts(texts)
+        embeddings.setflags(write=False)
+        
+        with _resume_embedding_cache_lock:
+            _resume_embedding_cache[key] = embeddings
+            if len(_resume_embedding_cache) > RESUME_CACHE_SIZE:
+                _resume_embedding_cache.popitem(last=False)
+        
+        return embeddings
+
+    def _build_match(self, skills, automaton, job, processed_job, scores, qualities, overall_score):
+        """
+        Build the match result for one job from its component scores.
+        
+        Args:
+            skills: List of resume skills
+            automaton: Output of skill_automaton for those skills
+            job: Dictionary containing job data
+            processed_job: Output of _preprocess_job
+            scores: Dictionary of component name -> similarity score
+            qualities: Dictionary of component name -> quality label
+            overall_score: Weighted overall match score
+            
+        Returns:
+            Dictionary with match score and reasons
+        """
+        reasons = {
+            component: self.reason_templates[component].format(quality)
+            for component, quality in qualities.items()
+        }
         
-        # Calculate weighted average score
-        overall_score = sum(scores[k] * self.weights[k] for k in self.weights)
         reasons['overall'] = self.reason_templates['overall'].format(overall_score)
         
-        # Extract key skills that match
-        job_desc_lower = processed_job['description'].lower()
+        # Extract key skills that match, with one pass over the description
         matching_skills = []
-        for skill in resume_data.get('skills', []):
-            if skill.lower() in job_desc_lower:
-                matching_skills.append(skill)
+        if automaton is not None:
+            found = {key for _, key in automaton.iter(processed_job['description_lower'])}
+            matching_skills = [skill for skill in skills if skill.lower() in found]
         
         # Return match results
         return {
@@ -254,6 +517,103 @@ class JobMatcher:
             'matching_skills': matching_skills
         }
 
+    def _match_preprocessed(self, processed_resume, resume_skills, jobs, processed_jobs):
+        """
+        Score a list of jobs against an already preprocessed resume.
+        
+        All job texts are encoded in one batch.
+        
+        Args:
+            processed_resume: Output of _preprocess_resume
+            resume_skills: List of skills from the parsed resume
+            jobs: List of job dictionaries
+            processed_jobs: Output of _preprocess_job for each job
+            
+        Returns:
+            List of match dictionaries in the same order as jobs
+        """
+        # Location scores that don't need the model (None where they do)
+        location_scores = [
+            self._location_rule_score(processed_resume['location'], processed_job['location'])
+            for processed_job in processed_jobs
+        ]
+        
+        # Collect every job text that needs an embedding and encode them together,
+        # reusing embeddings cached on disk by earlier searches. Locations already
+        # scored by rule are left empty so they aren't encoded.
+        job_texts = []
+        for processed_job, location_score in zip(processed_jobs, location_scores):
+            job_texts.extend(
+                '' if field == 'location' and location_score is not None else processed_job[field]
+                for field in JOB_FIELDS
+            )
+        
+        resume_matrix = self._encode_resume(processed_resume)
+        job_matrix = self._encode_texts(job_texts, use_cache=True).reshape(len(jobs), len(JOB_FIELDS), resume_matrix.shape[1])
+        
+        # (N, 5) component matrix, columns ordered like self.weights. Components are
+        # grouped by the job field they compare against, so each job embedding is
+        # read once per group: one (N, D) @ (D, k) product per job field.
+        # Embeddings are L2-normalized, so these products are cosine similarities.
+        # NumPy has no half-precision BLAS, so the half-precision blocks are widened
+        # to float32 for the product and accumulated in float32.
+        component_names = list(self.weights)
+        components = np.zeros((len(jobs), len(component_names)), dtype=np.float32)
+        for job_col, job_field in enumerate(JOB_FIELDS):
+            cols = [i for i, name in enumerate(component_names) if COMPONENT_PAIRS[name][1] == job_field]
+            rows = [RESUME_FIELDS.index(COMPONENT_PAIRS[component_names[i]][0]) for i in cols]
+            job_block = job_matrix[:, job_col].astype(np.float32)
+            resume_block = resume_matrix[rows].astype(np.float32)
+            components[:, cols] = job_block @ resume_block.T
+        
+        # Replace the location similarity wherever a rule already decided it
+        rule_scores = np.array(
+            [np.nan if score is None else score for score in location_scores],
+            dtype=np.float32
+        )
+        has_rule = ~np.isnan(rule_scores)
+        components[has_rule, component_names.index('location')] = rule_scores[has_rule]
+        
+        weights_vec = np.array([self.weights[k] for k in self.weights], dtype=components.dtype)
+        overall_scores = components @ weights_vec
+        
+        # Quality label for every component score at once
+        qualities = QUALITY_LABELS[np.digitize(components, QUALITY_BINS, right=True)]
+        
+        automaton = skill_automaton(tuple(resume_skills))
+        
+        return [
+            self._build_match(
+                resume_skills,
+                automaton,
+                job,
+                processed_job,
+                dict(zip(component_names, map(float, row))),
+                dict(zip(component_names, map(str, labels))),
+                float(overall)
+            )
+            for job, processed_job, row, labels, overall
+            in zip(jobs, processed_jobs, components, qualities, overall_scores)
+        ]
+
+    def match_job_to_resume(self, resume_data, job):
+        """
+        Calculate how well a job matches a resume.
+        
+        Args:
+            resume_data: Dictionary containing parsed resume data
+            job: Dictionary containing job data
+            
+        Returns:
+            Dictionary with match score and reasons
+        """
+        return self._match_preprocessed(
+            self._preprocess_resume(resume_data),
+            resume_data.get('skills', []),
+            [job],
+            [self._preprocess_job(job)]
+        )[0]
+
     def rank_jobs_for_resume(self, resume_data, jobs):
         """
         Rank a list of jobs based on how well they match a resume.
@@ -265,15 +625,26 @@ class JobMatcher:
         Returns:
             List of job matches sorted by match score (highest first)
         """
-        job_matches = []
-        
         print(f"Ranking {len(jobs)} jobs for resume match...")
-        for job in jobs:
-            match = self.match_job_to_resume(resume_data, job)
-            job_matches.append(match)
         
-        # Sort by match score (descending)
-        ranked_matches = sorted(job_matches, key=lambda x: x['match_score'], reverse=True)
+        # Preprocess the resume and every job once up front
+        processed_resume = self._preprocess_resume(resume_data)
+        processed_jobs = [self._preprocess_job(job) for job in jobs]
+        job_matches = self._match_preprocessed(
+            processed_resume,
+            resume_data.get('skills', []),
+            jobs,
+            processed_jobs
+        )
+        
+        # Sort by match score (descending); a stable sort keeps ties in listing order
+        scores = np.fromiter(
+            (match['match_score'] for match in job_matches),
+            dtype=np.float64,
+            count=len(job_matches)
+        )
+        order = np.argsort(-scores, kind='stable')
+        ranked_matches = [job_matches[i] for i in order]
         
         return ranked_matches
 
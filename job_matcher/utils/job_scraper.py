@@ -3,14 +3,21 @@ Job Scraper Module
 Scrapes entry-level job listings from popular job boards
 """
 
+import asyncio
+import hashlib
+import httpx
 import requests
+import sqlite3
+import threading
 import time
 import random
-import json
-from datetime import datetime
-from bs4 import BeautifulSoup
+import orjson
+from contextlib import closing
+from requests.adapters import HTTPAdapter
+from selectolax.lexbor import LexborHTMLParser
 from fake_useragent import UserAgent
 from pathlib import Path
+from urllib3.util.retry import Retry
 
 
 class JobScraper:
@@ -25,11 +32,44 @@ class JobScraper:
         self.cache_dir = cache_dir
         if self.cache_dir:
             Path(self.cache_dir).mkdir(parents=True, exist_ok=True)
-            self.cache_file = Path(self.cache_dir) / "job_cache.json"
+            self.cache_db = Path(self.cache_dir) / "jobs.sqlite"
+            with closing(sqlite3.connect(self.cache_db)) as conn, conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS jobs (key TEXT PRIMARY KEY, ts REAL, payload BLOB)"
+                )
+                conn.execute("CREATE INDEX IF NOT EXISTS jobs_ts ON jobs (ts)")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS descriptions (key TEXT PRIMARY KEY, ts REAL, description TEXT)"
+                )
+                conn.execute("CREATE INDEX IF NOT EXISTS descriptions_ts ON descriptions (ts)")
         
-        # Sleep ranges (in seconds) to appear more human-like when scraping
-        self.page_sleep_range = (2, 5)
+        # Cached searches older than this are scraped again
+        self.cache_max_age = 24 * 3600
+        
+        # Sleep range (in seconds) between requests to appear more human-like when scraping
         self.request_sleep_range = (1, 3)
+        
+        # Concurrent page requests allowed per scrape, and retries for failed
+        # or rate limited requests (with exponential backoff between attempts)
+        self.max_concurrent_requests = 8
+        self.max_retries = 3
+        
+        # Event loop and HTTP/2 client reused across scrape calls, so the
+        # connection (and TLS session) to Indeed stays open between searches.
+        # Both are created on first use.
+        self._loop = None
+        self._loop_lock = threading.Lock()
+        self._client = None
+        
+        # Keep-alive session with a connection pool for job description pages
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=16,
+            pool_maxsize=32,
+            max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504))
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
 
     def _get_headers(self):
         """Generate random headers for requests to avoid detection."""
@@ -39,77 +79,312 @@ class JobScraper:
             'Accept-Language': 'en-US,en;q=0.5',
             'Referer': 'https://www.google.com/',
             'DNT': '1',
-            'Connection': 'keep-alive',
             'Upgrade-Insecure-Requests': '1',
         }
 
+    def _get_client(self):
+        """Return the shared async HTTP client, creating it on first use."""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                http2=True,
+                headers={'Accept-Encoding': 'gzip, deflate, br'},
+                # Cap concurrent connections to avoid being rate limited
+                limits=httpx.Limits(max_connections=10),
+                follow_redirects=True,
+                timeout=30
+            )
+        return self._client
+
+    def _run(self, coro):
+        """Run a coroutine to completion on the scraper's event loop."""
+        with self._loop_lock:
+            if self._loop is None or self._loop.is_closed():
+                self._loop = asyncio.new_event_loop()
+            return self._loop.run_until_complete(coro)
+
+    def close(self):
+        """Close the shared HTTP clients and event loop."""
+        if self._client is not None:
+            self._run(self._client.aclose())
+            self._client = None
+        if self._loop is not None:
+            self._loop.close()
+            self._loop = None
+        self.session.close()
+
     def _random_sleep(self, range_tuple=None):
         """Sleep for a random amount of time within the given range."""
         if not range_tuple:
             range_tuple = self.request_sleep_range
         time.sleep(random.uniform(*range_tuple))
 
-    def _save_to_cache(self, jobs, query, location):
-        """Save scraped jobs to cache file."""
+    @staticmethod
+    def _cache_key(query, location):
+        """Create a cache key from query and location."""
+        return f"{query}_{location}".lower().replace(' ', '_')
+
+    def _save_to_cache(self, jobs, cache_key):
+        """Save scraped jobs to the cache database."""
         if not self.cache_dir:
             return
-            
-        cache_data = {}
-        # Load existing cache if it exists
-        if self.cache_file.exists():
-            try:
-                with open(self.cache_file, 'r', encoding='utf-8') as f:
-                    cache_data = json.load(f)
-            except (json.JSONDecodeError, FileNotFoundError):
-                # If cache is corrupted or missing, start with empty cache
-                cache_data = {}
-        
-        # Create a cache key from query and location
-        cache_key = f"{query}_{location}".lower().replace(' ', '_')
-        
-        # Update cache with new data
-        cache_data[cache_key] = {
-            "timestamp": datetime.now().isoformat(),
-            "query": query,
-            "location": location,
-            "jobs": jobs
-        }
         
-        # Save updated cache
-        with open(self.cache_file, 'w', encoding='utf-8') as f:
-            json.dump(cache_data, f, indent=2)
+        now = time.time()
+        try:
+            with closing(sqlite3.connect(self.cache_db)) as conn, conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO jobs (key, ts, payload) VALUES (?, ?, ?)",
+                    (cache_key, now, orjson.dumps(jobs))
+                )
+                # Drop expired searches so the cache doesn't grow without bound
+                conn.execute("DELETE FROM jobs WHERE ts <= ?", (now - self.cache_max_age,))
+        except sqlite3.Error as e:
+            print(f"Error writing job cache: {e}")
     
-    def _load_from_cache(self, query, location):
+    def _load_from_cache(self, cache_key):
         """Load jobs from cache if they exist and are recent."""
-        if not self.cache_dir or not self.cache_file.exists():
+        if not self.cache_dir:
             return None
+        
+        try:
+            with closing(sqlite3.connect(self.cache_db)) as conn:
+                row = conn.execute(
+                    "SELECT payload FROM jobs WHERE key = ? AND ts > ?",
+                    (cache_key, time.time() - self.cache_max_age)
+                ).fetchone()
+            
+            if row is not None:
+                jobs = orjson.loads(row[0])
+                print(f"Loading {len(jobs)} jobs from cache")
+                return jobs
+        
+        except (sqlite3.Error, ValueError) as e:
+            # If any error occurs, proceed with fresh scraping
+            print(f"Error reading job cache: {e}")
             
+        return None
+
+    @staticmethod
+    def _url_key(url):
+        """Hash a job URL into a short key used for de-duplication and caching."""
+        return hashlib.blake2b(url.encode('utf-8'), digest_size=16).hexdigest()
+
+    def _load_cached_descriptions(self, keys):
+        """Return a dictionary of URL key -> full description for recent cached descriptions."""
+        if not self.cache_dir or not keys:
+            return {}
+        
+        found = {}
         try:
-            with open(self.cache_file, 'r', encoding='utf-8') as f:
-                cache_data = json.load(f)
-                
-            # Create a cache key from query and location
-            cache_key = f"{query}_{location}".lower().replace(' ', '_')
+            with closing(sqlite3.connect(self.cache_db)) as conn:
+                # Stay well below SQLite's limit on query parameters
+                for start in range(0, len(keys), 500):
+                    chunk = keys[start:start + 500]
+                    rows = conn.execute(
+                        f"SELECT key, description FROM descriptions WHERE key IN ({','.join('?' * len(chunk))}) AND ts > ?",
+                        (*chunk, time.time() - self.cache_max_age)
+                    )
+                    found.update(rows)
+        except sqlite3.Error as e:
+            print(f"Error reading description cache: {e}")
+        
+        return found
+
+    def _store_cached_descriptions(self, items):
+        """Persist (URL key, full description) pairs to the cache database."""
+        if not self.cache_dir or not items:
+            return
+        
+        now = time.time()
+        try:
+            with closing(sqlite3.connect(self.cache_db)) as conn, conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO descriptions (key, ts, description) VALUES (?, ?, ?)",
+                    ((key, now, description) for key, description in items)
+                )
+                # Drop expired descriptions so the cache doesn't grow without bound
+                conn.execute("DELETE FROM descriptions WHERE ts <= ?", (now - self.cache_max_age,))
+        except sqlite3.Error as e:
+            print(f"Error writing description cache: {e}")
+
+    def _parse_search_page(self, html, query):
+        """
+        Extract job listings from an Indeed search results page.
+        
+        Args:
+            html: HTML of the search results page
+            query: Job search query the page was fetched for
+            
+        Returns:
+            List of job dictionaries
+        """
+        jobs = []
+        
+        tree = LexborHTMLParser(html)
+        job_cards = tree.css('div.job_seen_beacon')
+        
+        if not job_cards:
+            # Indeed changes their HTML structure frequently
+            # Try alternate selectors
+            job_cards = tree.css('div.jobsearch-SerpJobCard') or \
+                       tree.css('div.tapItem') or \
+                       tree.css('div[data-testid="job-card"]')
+        
+        for job_card in job_cards:
+            job = {}
             
-            if cache_key in cache_data:
-                # Check if cache is less than 24 hours old
-                cache_time = datetime.fromisoformat(cache_data[cache_key]["timestamp"])
-                time_diff = (datetime.now() - cache_time).total_seconds() / 3600
+            # Extract title (each field's selector list covers the different Indeed layouts)
+            title_elem = job_card.css_first('h2.jobTitle, a.jobtitle, h2.title, h2 a')
+                        
+            if title_elem:
+                # Get text from span child if it exists, otherwise use the h2 text
+                span = title_elem.css_first('span')
+                job['title'] = span.text().strip() if span else title_elem.text().strip()
+            else:
+                job['title'] = "Unknown Position"
                 
-                if time_diff < 24:  # Less than 24 hours old
-                    print(f"Loading {len(cache_data[cache_key]['jobs'])} jobs from cache")
-                    return cache_data[cache_key]["jobs"]
+            # Extract company
+            company_elem = job_card.css_first('span.companyName, div.company, [data-testid="company-name"]')
+                          
+            job['company'] = company_elem.text().strip() if company_elem else "Unknown Company"
+            
+            # Extract location
+            location_elem = job_card.css_first('div.companyLocation, .location, [data-testid="text-location"]')
+                           
+            job['location'] = location_elem.text().strip() if location_elem else "Unknown Location"
+            
+            # Extract job link
+            link_elem = job_card.css_first('a[id^="job_"], a.jobtitle, h2 a')
+                       
+            href = link_elem.attributes.get('href') if link_elem else None
+            if href is not None:
+                # Some links are relative, add domain if needed
+                if href.startswith('/'):
+                    job['url'] = f"https://www.indeed.com{href}"
+                else:
+                    job['url'] = href
+            else:
+                job['url'] = ""
+            
+            # Extract date posted
+            date_elem = job_card.css_first('span.date, .result-link-bar-container .date, [data-testid="text-date"]')
+                       
+            job['date_posted'] = date_elem.text().strip() if date_elem else ""
+            
+            # Extract snippet/description
+            snippet_elem = job_card.css_first('.job-snippet, .summary, [data-testid="job-snippet"]')
+                         
+            job['snippet'] = snippet_elem.text().strip() if snippet_elem else ""
+            
+            # Extract salary if available
+            salary_elem = job_card.css_first('.salary-snippet, .salaryText, [data-testid="text-salary"]')
+                         
+            job['salary'] = salary_elem.text().strip() if salary_elem else "Not specified"
+            
+            # Add job source info
+            job['source'] = 'Indeed'
+            job['query'] = query
+            job['full_description'] = ""  # Will be populated when needed
+            
+            jobs.append(job)
         
-        except (json.JSONDecodeError, KeyError, ValueError, FileNotFoundError):
-            # If any error occurs, proceed with fresh scraping
-            pass
+        return jobs
+
+    async def _fetch_page(self, url, page, num_pages, semaphore):
+        """
+        Fetch one search results page, retrying with exponential backoff.
+        
+        Args:
+            url: Page URL
+            page: Zero-based page index (for logging)
+            num_pages: Total number of pages being fetched (for logging)
+            semaphore: Semaphore bounding the number of requests in flight
+            
+        Returns:
+            Page HTML, or None if the request failed
+        """
+        # Stagger requests a little so they don't all hit Indeed at once
+        if page:
+            await asyncio.sleep(random.uniform(*self.request_sleep_range))
+        
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                # Back off 1s, 2s, 4s, ... plus jitter before retrying
+                await asyncio.sleep(2 ** (attempt - 1) + random.random())
             
+            try:
+                async with semaphore:
+                    print(f"Scraping Indeed page {page+1}/{num_pages}")
+                    response = await self._get_client().get(url, headers=self._get_headers())
+            except httpx.HTTPError as e:
+                # Network and protocol errors are usually transient, so retry
+                print(f"Error scraping Indeed page {page+1}: {e}")
+                continue
+            except Exception as e:
+                # Anything else won't be fixed by retrying, skip this page
+                print(f"Error scraping Indeed page {page+1}: {e}")
+                return None
+            
+            if response.status_code == 200:
+                return response.text
+            print(f"Indeed page {page+1} returned status {response.status_code}")
+            
+            # Only rate limiting and server errors are worth retrying
+            if response.status_code != 429 and response.status_code < 500:
+                break
+        
         return None
 
+    async def _scrape_page(self, url, page, num_pages, semaphore, query):
+        """Fetch and parse one search results page."""
+        html = await self._fetch_page(url, page, num_pages, semaphore)
+        if html is None:
+            return []
+        
+        try:
+            # Parse in a worker thread so other pages keep downloading meanwhile
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, self._parse_search_page, html, query)
+        except Exception as e:
+            print(f"Error parsing Indeed page {page+1}: {e}")
+            return []
+
+    async def _scrape_indeed_async(self, query, location, num_pages):
+        """Fetch and parse all Indeed result pages concurrently, keeping page order."""
+        # Format query for URL
+        formatted_query = query.replace(' ', '+')
+        formatted_location = location.replace(' ', '+')
+        
+        # Indeed uses 10 jobs per page
+        page_urls = [
+            f"https://www.indeed.com/jobs?q={formatted_query}&l={formatted_location}&sort=date&start={page * 10}"
+            for page in range(num_pages)
+        ]
+        
+        semaphore = asyncio.Semaphore(self.max_concurrent_requests)
+        pages = await asyncio.gather(*(
+            self._scrape_page(url, page, num_pages, semaphore, query)
+            for page, url in enumerate(page_urls)
+        ))
+        
+        # Result pages often overlap, so keep only the first listing of each job URL
+        seen_urls = set()
+        jobs = []
+        for job in (job for page_jobs in pages for job in page_jobs):
+            if job['url']:
+                url_key = self._url_key(job['url'])
+                if url_key in seen_urls:
+                    continue
+                seen_urls.add(url_key)
+            jobs.append(job)
+        
+        return jobs
+
     def scrape_indeed(self, query, location="United States", num_pages=3):
         """
         Scrape jobs from Indeed.
         
+        Result pages are fetched concurrently.
+        
         Args:
             query: Job search query (e.g. "entry level software developer")
             location: Location to search in
@@ -119,121 +394,27 @@ class JobScraper:
             List of job dictionaries
         """
         # Check cache first
-        cached_jobs = self._load_from_cache(query, location)
+        cache_key = self._cache_key(query, location)
+        cached_jobs = self._load_from_cache(cache_key)
         if cached_jobs:
             return cached_jobs
-            
-        jobs = []
         
-        # Format query for URL
-        formatted_query = query.replace(' ', '+')
-        formatted_location = location.replace(' ', '+')
+        jobs = self._run(self._scrape_indeed_async(query, location, num_pages))
         
-        for page in range(num_pages):
-            start_val = page * 10  # Indeed uses 10 jobs per page
-            
-            url = f"https://www.indeed.com/jobs?q={formatted_query}&l={formatted_location}&sort=date&start={start_val}"
-            
-            try:
-                print(f"Scraping Indeed page {page+1}/{num_pages}")
-                response = requests.get(url, headers=self._get_headers())
-                
-                if response.status_code == 200:
-                    soup = BeautifulSoup(response.text, 'html.parser')
-                    job_cards = soup.select('div.job_seen_beacon')
-                    
-                    if not job_cards:
-                        # Indeed changes their HTML structure frequently
-                        # Try alternate selectors
-                        job_cards = soup.select('div.jobsearch-SerpJobCard') or \
-                                   soup.select('div.tapItem') or \
-                                   soup.select('div[data-testid="job-card"]')
-                    
-                    for job_card in job_cards:
-                        job = {}
-                        
-                        # Extract title - try different possible selectors
-                        title_elem = job_card.select_one('h2.jobTitle') or \
-                                    job_card.select_one('a.jobtitle') or \
-                                    job_card.select_one('h2.title') or \
-                                    job_card.select_one('h2 a')
-                                    
-                        if title_elem:
-                            # Get text from span child if it exists, otherwise use the h2 text
-                            span = title_elem.select_one('span')
-                            job['title'] = span.text.strip() if span else title_elem.text.strip()
-                        else:
-                            job['title'] = "Unknown Position"
-                            
-                        # Extract company
-                        company_elem = job_card.select_one('span.companyName') or \
-                                      job_card.select_one('div.company') or \
-                                      job_card.select_one('[data-testid="company-name"]')
-                                      
-                        job['company'] = company_elem.text.strip() if company_elem else "Unknown Company"
-                        
-                        # Extract location
-                        location_elem = job_card.select_one('div.companyLocation') or \
-                                       job_card.select_one('.location') or \
-                                       job_card.select_one('[data-testid="text-location"]')
-                                       
-                        job['location'] = location_elem.text.strip() if location_elem else "Unknown Location"
-                        
-                        # Extract job link
-                        link_elem = job_card.select_one('a[id^="job_"]') or \
-                                   job_card.select_one('a.jobtitle') or \
-                                   job_card.select_one('h2 a')
-                                   
-                        if link_elem and 'href' in link_elem.attrs:
-                            href = link_elem['href']
-                            # Some links are relative, add domain if needed
-                            if href.startswith('/'):
-                                job['url'] = f"https://www.indeed.com{href}"
-                            else:
-                                job['url'] = href
-                        else:
-                            job['url'] = ""
-                        
-                        # Extract date posted
-                        date_elem = job_card.select_one('span.date') or \
-                                   job_card.select_one('.result-link-bar-container .date') or \
-                                   job_card.select_one('[data-testid="text-date"]')
-                                   
-                        job['date_posted'] = date_elem.text.strip() if date_elem else ""
-                        
-                        # Extract snippet/description
-                        snippet_elem = job_card.select_one('.job-snippet') or \
-                                     job_card.select_one('.summary') or \
-                                     job_card.select_one('[data-testid="job-snippet"]')
-                                     
-                        job['snippet'] = snippet_elem.text.strip() if snippet_elem else ""
-                        
-                        # Extract salary if available
-                        salary_elem = job_card.select_one('.salary-snippet') or \
-                                     job_card.select_one('.salaryText') or \
-                                     job_card.select_one('[data-testid="text-salary"]')
-                                     
-                        job['salary'] = salary_elem.text.strip() if salary_elem else "Not specified"
-                        
-                        # Add job source info
-                        job['source'] = 'Indeed'
-                        job['query'] = query
-                        job['full_description'] = ""  # Will be populated when needed
-                        
-                        jobs.append(job)
-                
-                # Sleep before next page to avoid rate limiting
-                self._random_sleep(self.page_sleep_range)
-                
-            except Exception as e:
-                print(f"Error scraping Indeed page {page+1}: {e}")
-                continue
-                
         # Save to cache
-        self._save_to_cache(jobs, query, location)
+        self._save_to_cache(jobs, cache_key)
         
         return jobs
     
+    def _parse_description(self, html):
+        """Extract the full job description text from a job page, or "" if not found."""
+        tree = LexborHTMLParser(html)
+        
+        # Job description selectors used by different Indeed layouts
+        description_elem = tree.css_first('#jobDescriptionText, .jobsearch-jobDescriptionText, .description')
+        
+        return description_elem.text().strip() if description_elem else ""
+
     def get_full_description(self, job):
         """
         Fetch the full job description by visiting the job URL.
@@ -250,18 +431,12 @@ class JobScraper:
             return job
             
         try:
-            response = requests.get(job['url'], headers=self._get_headers())
+            response = self.session.get(job['url'], headers=self._get_headers(), timeout=30)
             
             if response.status_code == 200:
-                soup = BeautifulSoup(response.text, 'html.parser')
-                
-                # Try different selectors for job description
-                description_elem = soup.select_one('#jobDescriptionText') or \
-                                  soup.select_one('.jobsearch-jobDescriptionText') or \
-                                  soup.select_one('.description')
-                                  
-                if description_elem:
-                    job['full_description'] = description_elem.text.strip()
+                description = self._parse_description(response.text)
+                if description:
+                    job['full_description'] = description
                     
                 # Random sleep to avoid rate limiting
                 self._random_sleep()
@@ -271,6 +446,78 @@ class JobScraper:
             
         return job
 
+    async def _fetch_description(self, job, semaphore):
+        """Fetch the full description of one job on the async client, updating it in place."""
+        if job.get('full_description') or not job.get('url'):
+            return job
+        
+        try:
+            async with semaphore:
+                response = await self._get_client().get(job['url'], headers=self._get_headers())
+                
+                if response.status_code == 200:
+                    # Parse in a worker thread so other descriptions keep downloading
+                    loop = asyncio.get_running_loop()
+                    description = await loop.run_in_executor(None, self._parse_description, response.text)
+                    if description:
+                        job['full_description'] = description
+                    
+                    # Hold the slot a little to avoid rate limiting
+                    await asyncio.sleep(random.uniform(*self.request_sleep_range))
+                
+        except Exception as e:
+            print(f"Error fetching full description: {e}")
+        
+        return job
+
+    async def _get_full_descriptions_async(self, jobs, concurrency):
+        """Fetch the full descriptions of all jobs concurrently."""
+        semaphore = asyncio.Semaphore(concurrency)
+        return await asyncio.gather(*(self._fetch_description(job, semaphore) for job in jobs))
+
+    def get_full_descriptions(self, jobs, concurrency=20):
+        """
+        Fetch the full descriptions of several jobs concurrently.
+        Updates the job objects in place.
+        
+        Each job page is fetched at most once, and descriptions are reused
+        from the cache when the same job was fetched recently.
+        
+        Args:
+            jobs: List of job dictionaries with 'url' fields
+            concurrency: Maximum number of job pages fetched at once
+            
+        Returns:
+            List of updated job dictionaries, in the same order
+        """
+        # Group the jobs still missing a description by URL
+        jobs_by_url = {}
+        for job in jobs:
+            if not job.get('full_description') and job.get('url'):
+                jobs_by_url.setdefault(self._url_key(job['url']), []).append(job)
+        
+        cached = self._load_cached_descriptions(list(jobs_by_url))
+        to_fetch = {}
+        for url_key, url_jobs in jobs_by_url.items():
+            if url_key in cached:
+                for job in url_jobs:
+                    job['full_description'] = cached[url_key]
+            else:
+                to_fetch[url_key] = url_jobs[0]
+        
+        self._run(self._get_full_descriptions_async(list(to_fetch.values()), concurrency))
+        
+        # Share fetched descriptions with duplicate jobs and remember them
+        fetched = []
+        for url_key, job in to_fetch.items():
+            if job.get('full_description'):
+                for duplicate in jobs_by_url[url_key][1:]:
+                    duplicate['full_description'] = job['full_description']
+                fetched.append((url_key, job['full_description']))
+        self._store_cached_descriptions(fetched)
+        
+        return jobs
+
     def scrape_jobs(self, query, location="United States", source="indeed", num_pages=3):
         """
         Main method to scrape jobs from specified source.
@@ -0,0 +1,198 @@
+"""
+Quantized Encoder Module
+Runs a sentence transformer as a dynamically quantized int8 ONNX model on CPU
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+import onnxruntime as ort
+from onnxruntime.quantization import QuantType, quantize_dynamic
+from optimum.onnxruntime import ORTModelForFeatureExtraction
+from transformers import AutoConfig, AutoTokenizer
+
+# Exported and quantized models are kept next to the other cached data
+DEFAULT_EXPORT_DIR = Path(__file__).resolve().parent.parent / "data" / "cache" / "onnx"
+
+
+class ExportError(RuntimeError):
+    """Raised when a model can't be exported to ONNX or quantized."""
+
+
+class QuantizedEncoder:
+    def __init__(self, model_name, export_dir=None, max_seq_length=256, token_cache_size=4096,
+                 num_threads=None):
+        """
+        Initialize the encoder, exporting and quantizing the model on first use.
+        Args:
+            model_name: Sentence transformer model name or Hugging Face model id
+            export_dir: Directory to store the exported ONNX models
+            max_seq_length: Maximum number of tokens per text (longer texts are truncated)
+            token_cache_size: Number of tokenized texts kept for reuse
+            num_threads: Threads ONNX Runtime uses per call (its default if None)
+        """
+        hub_id = model_name if '/' in model_name else f"sentence-transformers/{model_name}"
+        model_dir = Path(export_dir or DEFAULT_EXPORT_DIR) / hub_id.replace('/', '__')
+        quantized_path = model_dir / "model_quantized.onnx"
+
+        if not quantized_path.exists():
+            self._export(hub_id, model_dir, quantized_path)
+
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self.dimension = AutoConfig.from_pretrained(model_dir).hidden_size
+        self.max_seq_length = max_seq_length
+        self.pad_token_id = self.tokenizer.pad_token_id or 0
+
+        # Token ids of recently encoded texts, keyed by a hash of the text. The same
+        # job descriptions come back on every rerun and repeated search.
+        self._token_cache = OrderedDict()
+        self._token_cache_lock = threading.Lock()
+        self.token_cache_size = token_cache_size
+
+        # Fast tokenizers set truncation on the shared Rust tokenizer for each
+        # call, which fails if several threads tokenize at once
+        self._tokenizer_lock = threading.Lock()
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(
+            str(quantized_path),
+            sess_options=options,
+            providers=['CPUExecutionProvider']
+        )
+        self.input_names = [node.name for node in self.session.get_inputs()]
+        self.output_name = self.session.get_outputs()[0].name
+
+    @staticmethod
+    def _export(hub_id, model_dir, quantized_path):
+        """Export the model to ONNX and apply dynamic int8 weight quantization."""
+        print(f"Exporting {hub_id} to ONNX with int8 quantization (first-time setup)...")
+        model_dir.mkdir(parents=True, exist_ok=True)
+
+        try:
+            model = ORTModelForFeatureExtraction.from_pretrained(hub_id, export=True)
+            model.save_pretrained(model_dir)
+            AutoTokenizer.from_pretrained(hub_id).save_pretrained(model_dir)
+
+            quantize_dynamic(
+                str(model_dir / "model.onnx"),
+                str(quantized_path),
+                weight_type=QuantType.QInt8
+            )
+        except Exception as e:
+            # Don't leave a partial model behind that would be picked up next time
+            quantized_path.unlink(missing_ok=True)
+            raise ExportError(f"Could not export {hub_id} to ONNX: {e}") from e
+
+    def get_sentence_embedding_dimension(self):
+        """Return the size of the produced embeddings."""
+        return self.dimension
+
+    def _tokenize_cached(self, texts):
+        """
+        Tokenize texts, reusing token ids of texts seen before.
+
+        Args:
+            texts: List of strings
+
+        Returns:
+            List of unpadded int64 token id arrays, one per text
+        """
+        keys = [hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest() for text in texts]
+        token_ids = [None] * len(texts)
+        missing = []
+
+        with self._token_cache_lock:
+            for i, key in enumerate(keys):
+                ids = self._token_cache.get(key)
+                if ids is None:
+                    missing.append(i)
+                else:
+                    self._token_cache.move_to_end(key)
+                    token_ids[i] = ids
+
+        if missing:
+            with self._tokenizer_lock:
+                encoded = self.tokenizer(
+                    [texts[i] for i in missing],
+                    truncation=True,
+                    max_length=self.max_seq_length
+                )['input_ids']
+
+            with self._token_cache_lock:
+                for i, ids in zip(missing, encoded):
+                    token_ids[i] = np.array(ids, dtype=np.int64)
+                    self._token_cache[keys[i]] = token_ids[i]
+                while len(self._token_cache) > self.token_cache_size:
+                    self._token_cache.popitem(last=False)
+
+        return token_ids
+
+    def _encode_batch(self, token_ids):
+        """Pad one batch of token ids, run the model and mean-pool the token embeddings."""
+        max_len = max(len(ids) for ids in token_ids)
+        input_ids = np.full((len(token_ids), max_len), self.pad_token_id, dtype=np.int64)
+        attention_mask = np.zeros_like(input_ids)
+        for row, ids in enumerate(token_ids):
+            input_ids[row, :len(ids)] = ids
+            attention_mask[row, :len(ids)] = 1
+
+        # Single-sentence inputs, so token type ids are all zero
+        inputs = {
+            'input_ids': input_ids,
+            'attention_mask': attention_mask,
+            'token_type_ids': np.zeros_like(input_ids)
+        }
+        feed = {name: inputs[name] for name in self.input_names}
+
+        # (B, L, H) token embeddings -> (B, H) mean over non-padding tokens
+        token_embeddings = self.session.run([self.output_name], feed)[0]
+        mask = attention_mask[..., None].astype(token_embeddings.dtype)
+        summed = (token_embeddings * mask).sum(axis=1)
+        counts = np.clip(mask.sum(axis=1), 1e-9, None)
+        return summed / counts
+
+    def encode(self, sentences, batch_size=32, convert_to_numpy=True,
+               normalize_embeddings=False, show_progress_bar=False):
+        """
+        Encode texts into sentence embeddings.
+
+        Mirrors the subset of SentenceTransformer.encode used by JobMatcher,
+        so the two can be swapped.
+
+        Args:
+            sentences: A string or list of strings
+            batch_size: Number of texts per model call
+            convert_to_numpy: Kept for compatibility, results are always numpy arrays
+            normalize_embeddings: L2-normalize the returned embeddings
+            show_progress_bar: Kept for compatibility, no progress bar is shown
+
+        Returns:
+            Array of shape (D,) for a single string, otherwise (len(sentences), D)
+        """
+        single = isinstance(sentences, str)
+        if single:
+            sentences = [sentences]
+
+        # Encode in order of token count so each batch pads to a similar length
+        token_ids = self._tokenize_cached(sentences)
+        order = np.argsort([len(ids) for ids in token_ids], kind='stable')
+
+        batches = [
+            self._encode_batch([token_ids[i] for i in order[start:start + batch_size]])
+            for start in range(0, len(order), batch_size)
+        ]
+        embeddings = np.zeros((len(sentences), self.dimension), dtype=np.float32)
+        if batches:
+            embeddings[order] = np.vstack(batches)
+
+        if normalize_embeddings:
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            embeddings = embeddings / np.clip(norms, 1e-12, None)
+
+        return embeddings[0] if single else embeddings
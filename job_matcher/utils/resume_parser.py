@@ -3,23 +3,64 @@ Resume Parser Module
 Extracts structured data from resumes in PDF or text format
 """
 
+import hashlib
 import re
+import time
+import ahocorasick
+import orjson
 import PyPDF2
 import spacy
+from collections import Counter
 from pathlib import Path
 
+# PDFium parses PDFs much faster than PyPDF2, which is kept as a fallback
+try:
+    import pypdfium2 as pdfium
+except ImportError:
+    pdfium = None
+
+# Only named entities and sentence boundaries are used, so skip the pipeline
+# components that tag, parse and lemmatize tokens
+DISABLED_PIPES = ["tagger", "parser", "lemmatizer", "attribute_ruler"]
+
+# Version of the parsed resume format and extraction logic. Bump it whenever
+# parse_resume's output changes, so cached resumes are parsed again.
+PARSER_CACHE_VERSION = 2
+
+# Characters passed to spaCy at once, to bound its memory use
+NLP_MAX_CHARS = 30000
+
 # Load spaCy language model
 try:
-    nlp = spacy.load("en_core_web_sm")
+    nlp = spacy.load("en_core_web_sm", disable=DISABLED_PIPES)
 except OSError:
     # If model not installed, provide guidance
     print("Downloading spaCy language model (first-time setup)...")
     import subprocess
     subprocess.call(["python", "-m", "spacy", "download", "en_core_web_sm"])
-    nlp = spacy.load("en_core_web_sm")
+    nlp = spacy.load("en_core_web_sm", disable=DISABLED_PIPES)
+
+# Without the parser, sentence boundaries come from the much cheaper senter
+nlp.enable_pipe("senter")
+
+def _is_word_char(char):
+    """Return True for characters that regex \\w treats as word characters."""
+    return char.isalnum() or char == '_'
 
 class ResumeParser:
-    def __init__(self):
+    def __init__(self, cache_dir=None):
+        """
+        Initialize the resume parser.
+        Args:
+            cache_dir: Directory to store parsed resumes for reuse
+        """
+        # Create cache directory if specified. Like the job cache, parsed resumes
+        # older than a day are parsed again and pruned.
+        self.cache_dir = cache_dir
+        self.cache_max_age = 24 * 3600
+        if self.cache_dir:
+            Path(self.cache_dir).mkdir(parents=True, exist_ok=True)
+        
         self.common_degrees = [
             'bachelor', 'masters', 'phd', 'doctorate', 'bs', 'ba', 'mba', 'ms', 'ma',
             'b.s.', 'b.a.', 'm.b.a.', 'm.s.', 'm.a.', 'ph.d', 'b.tech', 'm.tech'
@@ -38,16 +79,76 @@ class ResumeParser:
             'time management', 'project management', 'adaptability', 'creativity', 'analytical',
             'attention to detail'
         ]
+        
+        # Common section headers for experience
+        self.experience_headers = [
+            'experience', 'work experience', 'professional experience',
+            'employment history', 'work history'
+        ]
+        
+        # Keywords of the section headers that can follow the experience section
+        self.section_end_keywords = ['education', 'skills', 'projects', 'certification', 'references']
+        
+        # Phrases that introduce a location preference
+        self.location_pref_indicators = [
+            "willing to relocate", "prefer to work in", "location preference",
+            "seeking positions in", "looking for opportunities in", "based in"
+        ]
+        
+        # Compile the matching patterns once rather than on every parse. Degree
+        # names are used as regex fragments, with an optional plural.
+        self._deg_re = re.compile(
+            r'\b(?:' + '|'.join(self.common_degrees) + r')[s]?\b', re.IGNORECASE
+        )
+        
+        # Single automaton over all skills, so extraction is one pass over the text.
+        # Each skill maps to its position in the skill lists to keep their order.
+        self._skill_automaton = ahocorasick.Automaton()
+        for index, skill in enumerate(self.common_tech_skills + self.common_soft_skills):
+            self._skill_automaton.add_word(skill.lower(), (index, skill))
+        self._skill_automaton.make_automaton()
+        
+        # One alternation per phrase group, so each line or text is scanned once
+        self._exp_header_re = re.compile(
+            '|'.join(map(re.escape, self.experience_headers)), re.IGNORECASE
+        )
+        self._section_end_re = re.compile(
+            '|'.join(map(re.escape, self.section_end_keywords)), re.IGNORECASE
+        )
+        self._pref_re = re.compile(
+            '|'.join(map(re.escape, self.location_pref_indicators)), re.IGNORECASE
+        )
+
+    def _extract_text_with_pdfium(self, pdf_path):
+        """Extract text from a PDF file with PDFium, one line break between pages."""
+        pdf = pdfium.PdfDocument(pdf_path)
+        try:
+            parts = []
+            for page in pdf:
+                textpage = page.get_textpage()
+                parts.append(textpage.get_text_range())
+                textpage.close()
+                page.close()
+        finally:
+            pdf.close()
+        
+        # PDFium ends lines with \r\n, the rest of the parser splits on \n
+        return "\n".join(parts).replace('\r\n', '\n')
 
     def extract_text_from_pdf(self, pdf_path):
         """Extract text from a PDF file."""
-        text = ""
+        if pdfium is not None:
+            try:
+                return self._extract_text_with_pdfium(pdf_path)
+            except Exception as e:
+                print(f"Error extracting text with PDFium, trying PyPDF2: {e}")
+        
         try:
             with open(pdf_path, 'rb') as file:
                 pdf_reader = PyPDF2.PdfReader(file)
-                for page_num in range(len(pdf_reader.pages)):
-                    text += pdf_reader.pages[page_num].extract_text()
-            return text
+                parts = [page.extract_text() or "" for page in pdf_reader.pages]
+            # Same page separator as the PDFium path
+            return "\n".join(parts)
         except Exception as e:
             print(f"Error extracting text from PDF: {e}")
             return ""
@@ -55,7 +156,9 @@ class ResumeParser:
     def extract_name(self, text, doc=None):
         """Extract candidate name using NER."""
         if doc is None:
-            doc = nlp(text[:1000])  # Process just the first 1000 chars for efficiency
+            # Only names in the first 500 chars are considered, so only parse those.
+            # nlp is already limited to the NER components.
+            doc = nlp(text[:500], disable=["senter"])
         
         # Look for person names at the beginning of the resume
         for ent in doc.ents:
@@ -74,66 +177,51 @@ class ResumeParser:
 
     def extract_degrees(self, text):
         """Extract education details."""
-        degrees = []
-        
-        # Find potential degree mentions
-        for degree in self.common_degrees:
-            pattern = re.compile(r'\b' + degree + r'[s]?\b', re.IGNORECASE)
-            if pattern.search(text):
-                # Get surrounding context (the line containing the degree)
-                for line in text.split('\n'):
-                    if pattern.search(line):
-                        degrees.append(line.strip())
+        # Keep each line that mentions a degree (in order, without duplicates)
+        degrees = {}
+        for line in text.split('\n'):
+            if self._deg_re.search(line):
+                degrees[line.strip()] = None
         
-        return list(set(degrees))
+        return list(degrees)
 
     def extract_skills(self, text):
         """Extract technical and soft skills."""
-        skills = []
-        
-        # Look for technical skills
-        for skill in self.common_tech_skills:
-            pattern = re.compile(r'\b' + re.escape(skill) + r'\b', re.IGNORECASE)
-            if pattern.search(text):
-                skills.append(skill)
+        text_lower = text.lower()
+        found = {}
         
-        # Look for soft skills
-        for skill in self.common_soft_skills:
-            pattern = re.compile(r'\b' + re.escape(skill) + r'\b', re.IGNORECASE)
-            if pattern.search(text):
-                skills.append(skill)
+        for end, (index, skill) in self._skill_automaton.iter(text_lower):
+            start = end - len(skill) + 1
+            
+            # Only keep whole-word hits, with the same boundary rule as \b in a regex
+            before = text_lower[start - 1] if start > 0 else ' '
+            after = text_lower[end + 1] if end + 1 < len(text_lower) else ' '
+            if _is_word_char(before) != _is_word_char(skill[0]) and \
+               _is_word_char(after) != _is_word_char(skill[-1]):
+                found[index] = skill
         
-        return skills
+        # Technical skills first, then soft skills, in list order
+        return [found[index] for index in sorted(found)]
 
     def extract_experience(self, text, doc=None):
         """Extract work experience information."""
-        if doc is None:
-            doc = nlp(text)
-            
         experiences = []
         
         # Look for sections that might contain experience
         experience_section = None
         
-        # Common section headers for experience
-        exp_headers = ['experience', 'work experience', 'professional experience', 
-                     'employment history', 'work history']
-        
         lines = text.split('\n')
         for i, line in enumerate(lines):
-            line_lower = line.lower().strip()
-            
             # Check if this line is an experience section header
-            if any(header in line_lower for header in exp_headers) and len(line) < 50:
+            if len(line) < 50 and self._exp_header_re.search(line):
                 start_idx = i + 1
                 end_idx = len(lines)
                 
                 # Find where the experience section ends (next section header)
                 for j in range(start_idx, len(lines)):
                     # Potential section headers are usually short lines with specific keywords
-                    if len(lines[j].strip()) < 50 and lines[j].strip() and \
-                       any(keyword in lines[j].lower() for keyword in 
-                           ['education', 'skills', 'projects', 'certification', 'references']):
+                    stripped = lines[j].strip()
+                    if stripped and len(stripped) < 50 and self._section_end_re.search(lines[j]):
                         end_idx = j
                         break
                 
@@ -149,53 +237,101 @@ class ResumeParser:
             
         return experiences
 
-    def extract_location_preference(self, text):
+    def _sentence_at(self, text, doc, start, end):
+        """
+        Find the sentence containing a span of the resume text.
+        
+        Args:
+            text: Resume text
+            doc: spaCy doc of the text (or of its beginning)
+            start: Start offset of the span in text
+            end: End offset of the span in text
+            
+        Returns:
+            spaCy sentence span, or None if no tokens cover the span
+        """
+        if end > len(doc.text):
+            # Past the parsed part of the resume, so parse only the surrounding text
+            offset = max(0, start - 500)
+            doc = nlp(text[offset:end + 500])
+            start, end = start - offset, end - offset
+        
+        span = doc.char_span(start, end, alignment_mode='expand')
+        return span.sent if span is not None else None
+
+    def extract_location_preference(self, text, doc=None):
         """Extract potential location preferences."""
-        doc = nlp(text)
+        if doc is None:
+            doc = nlp(text)
+            
         locations = []
         
-        # Extract locations using NER
-        for ent in doc.ents:
-            if ent.label_ in ["GPE", "LOC"]:  # Geopolitical Entity or Location
-                locations.append(ent.text)
+        # Extract locations using NER. The doc may cover only the start of a
+        # long resume, so the rest is parsed in chunks for the counts below.
+        rest = text[len(doc.text):]
+        rest_docs = nlp.pipe(rest[i:i + NLP_MAX_CHARS] for i in range(0, len(rest), NLP_MAX_CHARS))
+        for part in (doc, *rest_docs):
+            for ent in part.ents:
+                if ent.label_ in ["GPE", "LOC"]:  # Geopolitical Entity or Location
+                    locations.append(ent.text)
         
-        # Look specifically for location preferences in the text
-        pref_indicators = [
-            "willing to relocate", "prefer to work in", "location preference",
-            "seeking positions in", "looking for opportunities in", "based in"
-        ]
+        # Look specifically for location preferences in the text, finding the
+        # first mention of each indicator in a single scan
+        first_matches = {}
+        for match in self._pref_re.finditer(text):
+            first_matches.setdefault(match.group(0).lower(), match)
         
-        text_lower = text.lower()
-        for indicator in pref_indicators:
-            if indicator in text_lower:
-                # Get the sentence containing this indicator
-                pattern = re.compile(r'[^.!?]*' + re.escape(indicator) + r'[^.!?]*[.!?]', re.IGNORECASE)
-                match = pattern.search(text)
-                if match:
-                    # Check if this sentence contains locations we've already found
-                    sentence = match.group(0)
-                    for loc in locations:
-                        if loc.lower() in sentence.lower():
-                            return loc
-                    
-                    # If no known location in the sentence, try to find one
-                    sentence_doc = nlp(sentence)
-                    for ent in sentence_doc.ents:
-                        if ent.label_ in ["GPE", "LOC"]:
-                            return ent.text
+        for indicator in self.location_pref_indicators:
+            match = first_matches.get(indicator)
+            if match is None:
+                continue
+            
+            # Get the sentence containing this indicator
+            sentence = self._sentence_at(text, doc, match.start(), match.end())
+            if sentence is None:
+                continue
+            
+            # Check if this sentence contains locations we've already found
+            sentence_lower = sentence.text.lower()
+            for loc in locations:
+                if loc.lower() in sentence_lower:
+                    return loc
+            
+            # If no known location in the sentence, try to find one
+            for ent in sentence.ents:
+                if ent.label_ in ["GPE", "LOC"]:
+                    return ent.text
         
         # Return the most frequently mentioned location or the first one
         if locations:
-            # Count occurrences
-            location_counts = {}
-            for loc in locations:
-                location_counts[loc] = location_counts.get(loc, 0) + 1
-            
-            # Get the most mentioned location
-            return max(location_counts.items(), key=lambda x: x[1])[0]
+            # Ties go to the location mentioned first
+            return Counter(locations).most_common(1)[0][0]
         
         return "Not specified"
 
+    def _cache_path(self, text):
+        """Return the cache file for the parsed form of this resume text."""
+        # Include the parser, spaCy and model versions and the word lists, so
+        # changing any of them re-parses resumes
+        versions = f"{PARSER_CACHE_VERSION}|{spacy.__version__}|{nlp.meta.get('name')}|{nlp.meta.get('version')}"
+        word_lists = orjson.dumps([
+            self.common_degrees, self.common_tech_skills, self.common_soft_skills,
+            self.experience_headers, self.section_end_keywords, self.location_pref_indicators
+        ]).decode('utf-8')
+        key = hashlib.blake2b(f"{versions}\n{word_lists}\n{text}".encode('utf-8'), digest_size=16).hexdigest()
+        return Path(self.cache_dir) / f"resume_{key}.json"
+
+    def _prune_cache(self):
+        """Delete cached resumes older than cache_max_age."""
+        min_mtime = time.time() - self.cache_max_age
+        for cache_path in Path(self.cache_dir).glob("resume_*.json"):
+            try:
+                if cache_path.stat().st_mtime <= min_mtime:
+                    cache_path.unlink()
+            except OSError:
+                # Removed concurrently or not ours to delete
+                pass
+
     def parse_resume(self, file_path):
         """
         Main function to parse a resume file and extract structured information
@@ -223,25 +359,46 @@ class ResumeParser:
         if not text:
             return {"error": "Could not extract text from the provided file"}
         
+        # Reuse the earlier result if this exact resume was parsed before
+        cache_path = self._cache_path(text) if self.cache_dir else None
+        if cache_path is not None and cache_path.exists():
+            try:
+                if time.time() - cache_path.stat().st_mtime < self.cache_max_age:
+                    resume_data = orjson.loads(cache_path.read_bytes())
+                    resume_data["raw_text"] = text
+                    return resume_data
+            except (OSError, ValueError):
+                # If the cache entry is unreadable, parse the resume again
+                pass
+        
         # Process with spaCy for NER and other analyses
-        # Limit to first 30K characters for memory efficiency
-        doc = nlp(text[:30000])
+        # Limit to the first characters for memory efficiency
+        doc = nlp(text[:NLP_MAX_CHARS])
         
         # Extract information
         name = self.extract_name(text, doc)
         degrees = self.extract_degrees(text)
         skills = self.extract_skills(text)
         experience = self.extract_experience(text, doc)
-        location = self.extract_location_preference(text)
+        location = self.extract_location_preference(text, doc)
         
-        return {
+        resume_data = {
             "name": name,
             "degrees": degrees,
             "skills": skills,
             "experience": experience,
-            "location_preference": location,
-            "raw_text": text  # Include raw text for any additional processing
+            "location_preference": location
         }
+        
+        if cache_path is not None:
+            try:
+                cache_path.write_bytes(orjson.dumps(resume_data))
+                self._prune_cache()
+            except OSError as e:
+                print(f"Error writing resume cache: {e}")
+        
+        resume_data["raw_text"] = text  # Include raw text for any additional processing
+        return resume_data
 
 # Test function
 if __name__ == "__main__":